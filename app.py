@@ -2,7 +2,7 @@
 # with error handling and proper routes
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
 import mastodon_service
-from mastodon_service import InvalidInputError, RateLimitError, APIError
+from mastodon_service import InvalidInputError, RateLimitError, APIError, OverloadError
 
 # Initialize Flask application 
 app = Flask(__name__)
@@ -32,6 +32,9 @@ def index():
         except RateLimitError:
             # API rate limit hit
             flash("Rate limit reached. Please try again later.", "warning")
+        except OverloadError:
+            # Request shed by the concurrency limiter
+            flash("Service is busy. Please try again shortly.", "warning")
         except APIError as e:
             # Other API errors
             flash(f"API Error: {str(e)}", "danger")
@@ -50,6 +53,9 @@ def index():
             except RateLimitError:
                 # API rate limit hit
                 flash("Rate limit reached. Please try again later.", "warning")
+            except OverloadError:
+                # Request shed by the concurrency limiter
+                flash("Service is busy. Please try again shortly.", "warning")
             except APIError as e:
                 # Other API errors
                 flash(f"API Error: {str(e)}", "danger")
@@ -70,6 +76,9 @@ def index():
             except RateLimitError:
                 # API rate limit hit
                 flash("Rate limit reached. Please try again later.", "warning")
+            except OverloadError:
+                # Request shed by the concurrency limiter
+                flash("Service is busy. Please try again shortly.", "warning")
             except APIError as e:
                 # Other API errors
                 flash(f"API Error: {str(e)}", "danger")
@@ -105,6 +114,9 @@ def create_post():
     except RateLimitError as e:
         # Rate limit exceeded 
         return jsonify({"success": False, "error": str(e)}), 429
+    except OverloadError as e:
+        # Shed by the concurrency limiter
+        return jsonify({"success": False, "error": str(e)}), 503
     except APIError as e:
         # Other API errors
         return jsonify({"success": False, "error": str(e)}), 500
@@ -124,6 +136,9 @@ def retrieve_post(post_id):
     except RateLimitError as e:
         # Rate limit exceeded 
         return jsonify({"success": False, "error": str(e)}), 429
+    except OverloadError as e:
+        # Shed by the concurrency limiter
+        return jsonify({"success": False, "error": str(e)}), 503
     except APIError as e:
         # Other errors 
         return jsonify({"success": False, "error": str(e)}), 500
@@ -148,10 +163,20 @@ def delete_post(post_id):
     except RateLimitError as e:
         # Rate limit exceeded 
         return jsonify({"success": False, "error": str(e)}), 429
+    except OverloadError as e:
+        # Shed by the concurrency limiter
+        return jsonify({"success": False, "error": str(e)}), 503
     except APIError as e:
         # Other API errors 
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route("/limiter", methods=["GET"])
+def limiter_status():
+    """
+    API endpoint exposing the upstream concurrency limit and queue depth
+    """
+    return jsonify({"success": True, "limiter": mastodon_service.limiter_stats()}), 200
+
 # Run the application in debug mode when executed directly
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -2,7 +2,9 @@
 # Created with error handling and rate limiting support
 import os
 import requests
+import threading
 import time
+from collections import deque
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -19,6 +21,26 @@ ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
 MAX_RETRIES = 3
 # Default delay in seconds between retries
 RETRY_DELAY = 60  # seconds to wait when rate limited
+# Timeout in seconds for a single upstream HTTP call
+REQUEST_TIMEOUT = 10
+
+# Adaptive concurrency limit (AIMD) for upstream calls
+# Starting number of in-flight upstream requests allowed
+INITIAL_CONCURRENCY = 10
+# Lower and upper bounds for the adaptive limit
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 100
+# Factor the limit is multiplied by on errors or latency spikes
+BACKOFF_RATIO = 0.5
+# Short-term RTT above this multiple of the long-term RTT counts as congestion
+LATENCY_TOLERANCE = 2.0
+# Smoothing weights for the short-term and long-term RTT averages
+SHORT_RTT_WEIGHT = 0.2
+LONG_RTT_WEIGHT = 0.02
+# Maximum number of callers waiting for a free slot
+MAX_QUEUE_SIZE = 50
+# Maximum seconds a caller waits for a free slot before being shed
+QUEUE_TIMEOUT = 2.0
 
 # Default headers for all API requests
 headers = {
@@ -48,6 +70,169 @@ class APIError(MastodonServiceError):
     This includes server errors, authentication failures, and network issues"""
     pass
 
+class OverloadError(MastodonServiceError):
+    """Exception raised when a request is shed by the concurrency limiter
+    Indicates the upstream is saturated and the request was not sent"""
+    pass
+
+
+# Concurrency Limiter
+
+class ConcurrencyLimiter:
+    """
+    Adaptive (AIMD) limit on in-flight upstream requests
+
+    The limit grows by roughly one for every window of fast, successful
+    calls and is cut by BACKOFF_RATIO on errors or when the short-term
+    RTT average exceeds LATENCY_TOLERANCE times the long-term average.
+    At most one cut is made per window: congestion reported by calls
+    that started before the last cut is ignored. Callers over the limit
+    wait in a bounded FIFO queue and are shed with OverloadError when
+    the queue is full or the wait times out.
+    """
+
+    def __init__(self, initial_limit=INITIAL_CONCURRENCY,
+                 min_limit=MIN_CONCURRENCY, max_limit=MAX_CONCURRENCY,
+                 backoff_ratio=BACKOFF_RATIO,
+                 latency_tolerance=LATENCY_TOLERANCE,
+                 short_rtt_weight=SHORT_RTT_WEIGHT,
+                 long_rtt_weight=LONG_RTT_WEIGHT,
+                 max_queue_size=MAX_QUEUE_SIZE, queue_timeout=QUEUE_TIMEOUT):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.short_rtt_weight = short_rtt_weight
+        self.long_rtt_weight = long_rtt_weight
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters = deque()
+        # Number of cuts so far, handed out as the window token in acquire()
+        self._cuts = 0
+        self._short_rtt = None
+        self._long_rtt = None
+        self._last_rtt = None
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        """Current number of in-flight requests allowed"""
+        return max(self.min_limit, int(self._limit))
+
+    def acquire(self):
+        """
+        Reserve a slot for an upstream call, waiting if the limit is reached
+
+        Returns the window token to pass back to release()
+        """
+        with self._cond:
+            # Only skip the queue when nobody is already waiting in it
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                return self._cuts
+            # Shed immediately rather than grow the queue without bound
+            if len(self._waiters) >= self.max_queue_size:
+                raise OverloadError("Service is overloaded, please try again later")
+            waiter = object()
+            self._waiters.append(waiter)
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self._waiters[0] is not waiter or self._in_flight >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise OverloadError("Timed out waiting for upstream capacity")
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+                return self._cuts
+            finally:
+                self._waiters.remove(waiter)
+                # Let the next caller in line check for a free slot
+                self._cond.notify_all()
+
+    def release(self, token, rtt, success):
+        """
+        Free a slot and adjust the limit from the call's RTT and outcome
+
+        rtt is None when the call produced no usable latency sample
+        """
+        with self._cond:
+            self._in_flight -= 1
+            # Calls that started before the last cut were already acted on
+            stale = token != self._cuts
+            congested = not success
+            if rtt is not None:
+                self._last_rtt = rtt
+                if self._long_rtt is None:
+                    self._short_rtt = self._long_rtt = rtt
+                else:
+                    # Stale samples would re-trigger the cut they already caused
+                    if not stale:
+                        self._short_rtt += (rtt - self._short_rtt) * self.short_rtt_weight
+                    self._long_rtt += (rtt - self._long_rtt) * self.long_rtt_weight
+                if self._short_rtt > self._long_rtt * self.latency_tolerance:
+                    congested = True
+
+            if congested:
+                # Multiplicative decrease, once per window
+                if not stale:
+                    self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                    self._cuts += 1
+                    # Require fresh evidence before the next latency cut
+                    self._short_rtt = self._long_rtt
+            elif not stale and rtt is not None and self._in_flight + 1 >= self.limit / 2:
+                # Additive increase, only on fresh measured successes while the limit is in use
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Snapshot of the limiter state
+        """
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_queue_size": self.max_queue_size,
+                "short_rtt": self._short_rtt,
+                "long_rtt": self._long_rtt,
+                "last_rtt": self._last_rtt,
+            }
+
+
+# Shared limiter for all upstream calls made by this process
+limiter = ConcurrencyLimiter()
+
+
+def _send(method, url, **kwargs):
+    """
+    Perform an upstream HTTP call through the concurrency limiter
+    """
+    token = limiter.acquire()
+    start = time.monotonic()
+    rtt = None
+    success = False
+    try:
+        response = getattr(requests, method)(url, headers=headers,
+                                             timeout=REQUEST_TIMEOUT, **kwargs)
+        # Only 2xx latencies feed the RTT averages; fast 4xx replies would skew them
+        if 200 <= response.status_code < 300:
+            rtt = time.monotonic() - start
+        # Rate limits and server errors are signs the upstream is saturated
+        success = response.status_code != 429 and response.status_code < 500
+        return response
+    finally:
+        limiter.release(token, rtt, success)
+
+
+def limiter_stats():
+    """
+    Current concurrency limit and queue depth for upstream calls
+    """
+    return limiter.stats()
+
 
 # Service Functions
 
@@ -69,11 +254,10 @@ def create(text):
     for attempt in range(MAX_RETRIES):
         try:
             # Send the post request to the API
-            response = requests.post(
+            response = _send(
+                "post",
                 f"{BASE_URL}/statuses",
-                headers=headers,
-                data={"status": text},
-                timeout=10  
+                data={"status": text}
             )
             
             # Process response based on status code
@@ -103,6 +287,11 @@ def create(text):
                 time.sleep(RETRY_DELAY)
                 continue
             raise APIError(f"Request failed: {str(e)}")
+        except MastodonServiceError:
+            raise
+        except Exception as e:
+            # Unexpected errors are reported as API errors without retrying
+            raise APIError(f"Request failed: {str(e)}")
     
     # This code should never be reached if retry logic is working
     raise APIError("Maximum retries exceeded")
@@ -120,11 +309,7 @@ def retrieve(post_id):
     for attempt in range(MAX_RETRIES):
         try:
             # Send the GET request to fetch post data
-            response = requests.get(
-                f"{BASE_URL}/statuses/{post_id}", 
-                headers=headers,
-                timeout=10  
-            )
+            response = _send("get", f"{BASE_URL}/statuses/{post_id}")
             
             # Process response based on status code
             if response.status_code == 200:
@@ -150,6 +335,11 @@ def retrieve(post_id):
                 time.sleep(RETRY_DELAY)
                 continue
             raise APIError(f"Request failed: {str(e)}")
+        except MastodonServiceError:
+            raise
+        except Exception as e:
+            # Unexpected errors are reported as API errors without retrying
+            raise APIError(f"Request failed: {str(e)}")
     
     # This code should never be reached if retry logic is working
     raise APIError("Maximum retries exceeded")
@@ -167,11 +357,7 @@ def delete(post_id):
     for attempt in range(MAX_RETRIES):
         try:
             # Send the DELETE request
-            response = requests.delete(
-                f"{BASE_URL}/statuses/{post_id}", 
-                headers=headers,
-                timeout=10 
-            )
+            response = _send("delete", f"{BASE_URL}/statuses/{post_id}")
             
             # Process response based on status code
             if response.status_code == 200:
@@ -197,6 +383,11 @@ def delete(post_id):
                 time.sleep(RETRY_DELAY)
                 continue
             raise APIError(f"Request failed: {str(e)}")
+        except MastodonServiceError:
+            raise
+        except Exception as e:
+            # Unexpected errors are reported as API errors without retrying
+            raise APIError(f"Request failed: {str(e)}")
     
     # This code should never be reached if retry logic is working
     raise APIError("Maximum retries exceeded")
\ No newline at end of file
@@ -3,7 +3,11 @@ import unittest
 from unittest.mock import patch, MagicMock
 from app import app
 import json
-from mastodon_service import InvalidInputError, RateLimitError, APIError
+import requests
+import threading
+import time
+import mastodon_service
+from mastodon_service import InvalidInputError, RateLimitError, APIError, OverloadError, ConcurrencyLimiter
 
 class MastodonServiceTestCase(unittest.TestCase):
     """
@@ -18,6 +22,10 @@ class MastodonServiceTestCase(unittest.TestCase):
         """
         self.app = app.test_client()
         self.app.testing = True
+        # Fresh limiter so state does not leak between tests
+        limiter_patch = patch.object(mastodon_service, 'limiter', ConcurrencyLimiter())
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
         
     @patch('mastodon_service.requests.post')
     def test_create_success(self, mock_post):
@@ -269,6 +277,9 @@ class MastodonServiceTestCase(unittest.TestCase):
             data = json.loads(response.data)
             self.assertEqual(data['success'], False)
             self.assertIn('error', data)
+
+        # The limiter slot is released even for non-requests exceptions
+        self.assertEqual(mastodon_service.limiter_stats()['in_flight'], 0)
             
     def test_home_page_loads(self):
         """
@@ -298,6 +309,233 @@ class MastodonServiceTestCase(unittest.TestCase):
         self.assertEqual(data['success'], False)
         self.assertIn('character limit', data['error'].lower())
 
+    def test_limiter_sheds_when_full(self):
+        """
+        Test that the concurrency limiter sheds excess requests
+
+        Verifies that callers over the limit get OverloadError once the
+        queue is full or the wait times out.
+        """
+        limiter = ConcurrencyLimiter(initial_limit=1, max_queue_size=0)
+        limiter.acquire()
+        # Queue is disabled, so the second caller is shed immediately
+        with self.assertRaises(OverloadError):
+            limiter.acquire()
+
+        limiter = ConcurrencyLimiter(initial_limit=1, queue_timeout=0.01)
+        limiter.acquire()
+        # Slot is never released, so the queued caller times out
+        with self.assertRaises(OverloadError):
+            limiter.acquire()
+        self.assertEqual(limiter.stats()['queue_depth'], 0)
+
+    def test_limiter_wakes_queued_caller(self):
+        """
+        Test that a queued caller gets the slot once it is released
+        """
+        limiter = ConcurrencyLimiter(initial_limit=1, queue_timeout=5)
+        token = limiter.acquire()
+        acquired = threading.Event()
+
+        def waiter():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        # Wait until the thread is actually queued
+        deadline = time.monotonic() + 5
+        while limiter.stats()['queue_depth'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(limiter.stats()['queue_depth'], 1)
+        self.assertFalse(acquired.is_set())
+
+        limiter.release(token, 0.1, True)
+        thread.join(5)
+
+        self.assertTrue(acquired.is_set())
+        stats = limiter.stats()
+        self.assertEqual(stats['in_flight'], 1)
+        self.assertEqual(stats['queue_depth'], 0)
+
+    def test_limiter_queue_is_fifo(self):
+        """
+        Test that new arrivals cannot jump ahead of queued callers
+        """
+        limiter = ConcurrencyLimiter(initial_limit=1, max_limit=1, queue_timeout=5)
+        token = limiter.acquire()
+        acquired = threading.Event()
+
+        def waiter():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while limiter.stats()['queue_depth'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        # A late arrival right after the release must queue behind the waiter
+        limiter.queue_timeout = 0.2
+        limiter.release(token, 0.1, True)
+        with self.assertRaises(OverloadError):
+            limiter.acquire()
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(limiter.stats()['in_flight'], 1)
+
+    def test_limiter_adjusts_limit(self):
+        """
+        Test that the limit grows on fast successes and shrinks on errors
+        """
+        # Limit grows additively while fully used
+        limiter = ConcurrencyLimiter(initial_limit=1)
+        for _ in range(10):
+            token = limiter.acquire()
+            limiter.release(token, 0.1, True)
+        self.assertGreater(limiter.limit, 1)
+
+        # Errors cut the limit multiplicatively
+        limiter = ConcurrencyLimiter(initial_limit=8)
+        token = limiter.acquire()
+        limiter.release(token, None, False)
+        self.assertEqual(limiter.limit, 4)
+
+        # Sustained latency increases also count as congestion
+        token = limiter.acquire()
+        limiter.release(token, 0.1, True)
+        token = limiter.acquire()
+        limiter.release(token, 1.0, True)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_limiter_single_cut_per_window(self):
+        """
+        Test that concurrent slow calls halve the limit only once
+        """
+        limiter = ConcurrencyLimiter(initial_limit=10)
+        for _ in range(20):
+            token = limiter.acquire()
+            limiter.release(token, 0.1, True)
+
+        # Ten calls in flight together all come back at 5x the usual RTT
+        tokens = [limiter.acquire() for _ in range(10)]
+        for token in tokens:
+            limiter.release(token, 0.5, True)
+        self.assertEqual(limiter.limit, 5)
+
+        # A fresh fast call after the slow window must not cut again
+        token = limiter.acquire()
+        limiter.release(token, 0.1, True)
+        self.assertEqual(limiter.limit, 5)
+
+        # Errors from the same window are ignored as well
+        tokens = [limiter.acquire() for _ in range(3)]
+        limiter.release(tokens[0], None, False)
+        limiter.release(tokens[1], None, False)
+        limiter.release(tokens[2], None, False)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_limiter_ignores_single_fast_outlier(self):
+        """
+        Test that one unusually fast response does not trigger later cuts
+        """
+        limiter = ConcurrencyLimiter(initial_limit=10)
+        for rtt in [0.1, 0.01, 0.1, 0.12, 0.09, 0.11, 0.1]:
+            token = limiter.acquire()
+            limiter.release(token, rtt, True)
+        self.assertEqual(limiter.limit, 10)
+
+    def test_limiter_no_increase_without_rtt(self):
+        """
+        Test that replies without a latency sample do not grow the limit
+        """
+        limiter = ConcurrencyLimiter(initial_limit=1)
+        for _ in range(10):
+            token = limiter.acquire()
+            limiter.release(token, None, True)
+        self.assertEqual(limiter.limit, 1)
+
+    @patch('mastodon_service.requests.get')
+    def test_send_cuts_limit_on_server_error(self, mock_get):
+        """
+        Test that 5xx and 429 responses are reported as congestion
+        """
+        mock_response = MagicMock()
+        mock_response.status_code = 503
+        mock_response.text = 'Service unavailable'
+        mock_get.return_value = mock_response
+
+        with self.assertRaises(APIError):
+            mastodon_service.retrieve('123456')
+        self.assertEqual(mastodon_service.limiter.limit, 5)
+
+        mock_response.status_code = 429
+        mock_response.headers = {'Retry-After': '60'}
+        with patch('time.sleep'):
+            with self.assertRaises(RateLimitError):
+                mastodon_service.retrieve('123456')
+        self.assertLess(mastodon_service.limiter.limit, 5)
+        self.assertEqual(mastodon_service.limiter_stats()['in_flight'], 0)
+
+    @patch('mastodon_service.requests.get')
+    def test_send_cuts_limit_on_timeout(self, mock_get):
+        """
+        Test that request exceptions cut the limit and free the slot
+        """
+        mock_get.side_effect = requests.Timeout("Read timed out")
+
+        with patch('time.sleep'):
+            with self.assertRaises(APIError):
+                mastodon_service.retrieve('123456')
+
+        stats = mastodon_service.limiter_stats()
+        self.assertLess(stats['limit'], mastodon_service.INITIAL_CONCURRENCY)
+        self.assertEqual(stats['in_flight'], 0)
+
+    @patch('mastodon_service.requests.get')
+    def test_send_keeps_limit_on_client_error(self, mock_get):
+        """
+        Test that 4xx responses neither cut nor grow the limit
+        """
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_response.text = 'Not found'
+        mock_get.return_value = mock_response
+
+        for _ in range(10):
+            with self.assertRaises(InvalidInputError):
+                mastodon_service.retrieve('nonexistent')
+        self.assertEqual(mastodon_service.limiter.limit, mastodon_service.INITIAL_CONCURRENCY)
+
+    @patch('mastodon_service.requests.get')
+    def test_retrieve_overloaded(self, mock_get):
+        """
+        Test that shed requests return 503 without calling the API
+        """
+        limiter = ConcurrencyLimiter(initial_limit=1, max_queue_size=0)
+        limiter.acquire()
+
+        with patch.object(mastodon_service, 'limiter', limiter):
+            response = self.app.get('/retrieve/123456')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(data['success'], False)
+        mock_get.assert_not_called()
+
+    def test_limiter_status(self):
+        """
+        Test that the /limiter endpoint exposes limit and queue depth
+        """
+        response = self.app.get('/limiter')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['limiter']['limit'], mastodon_service.INITIAL_CONCURRENCY)
+        self.assertEqual(data['limiter']['queue_depth'], 0)
+        self.assertEqual(data['limiter']['in_flight'], 0)
+
 # Run the tests when the script is executed directly
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file